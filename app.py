@@ -1,11 +1,37 @@
 import streamlit as st
-import json
+import orjson
 import pandas as pd
 import streamlit.components.v1 as components
 from logic import process_analysis, generate_html_report
 
 st.set_page_config(page_title="Bank Statement Analyzer", layout="wide")
 
+# --- CACHED HELPERS ---
+# Streamlit reruns the whole script on every widget change; these keep unchanged
+# uploads and settings from being re-parsed and re-analysed.
+
+def parse_statement(raw: bytes) -> dict:
+    # Called once per upload (results live in session_state, keyed by file_id).
+    # Only the arrays the analysis reads are kept, so extra payload in large
+    # statements (metadata, raw text, etc.) is not held in the session
+    content = orjson.loads(raw)
+    return {key: content.get(key, []) for key in ('transactions', 'monthly_summary')}
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl="1h")
+def run_analysis(company_name, company_keywords, related_parties, account_info, file_ids, _uploaded_data):
+    # file_ids maps account key -> upload file_id and stands in for the parsed
+    # statements in the cache key; the leading underscore keeps _uploaded_data unhashed.
+    # Each entry holds a full results dict plus the rendered report, and every settings
+    # edit makes a new key, so the cache is bounded in size and age
+    results = process_analysis(
+        company_name=company_name,
+        company_keywords=company_keywords,
+        related_parties=related_parties,
+        account_info=account_info,
+        uploaded_data=_uploaded_data
+    )
+    return results, generate_html_report(results, template_path="template.html")
+
 st.title("🏦 Universal Bank Statement Analyzer")
 st.markdown("Upload standard JSON bank statement files to analyze turnover, detect related party transactions, and check integrity.")
 
@@ -42,6 +68,15 @@ with st.sidebar:
 st.header("3. Upload Files")
 uploaded_files = st.file_uploader("Upload JSON Files", type=['json'], accept_multiple_files=True)
 
+# Parse each upload once per session, keyed by its stable file_id, and drop files
+# that have since been removed from the uploader (including when none are left)
+if 'parsed_statements' not in st.session_state:
+    st.session_state.parsed_statements = {}
+parsed = st.session_state.parsed_statements
+current_ids = {file.file_id for file in uploaded_files or []}
+for stale_id in set(parsed) - current_ids:
+    del parsed[stale_id]
+
 if uploaded_files:
     st.success(f"{len(uploaded_files)} files uploaded.")
     
@@ -49,14 +84,16 @@ if uploaded_files:
     st.subheader("4. Account Mapping")
     account_info = {}
     uploaded_data_content = {}
-    
+    file_ids = {}
+
     cols = st.columns(2)
     
     for i, file in enumerate(uploaded_files):
-        # Read file content once
-        content = json.load(file)
+        if file.file_id not in parsed:
+            parsed[file.file_id] = parse_statement(file.getvalue())
         file_key = f"ACC_{i+1}"
-        uploaded_data_content[file_key] = content
+        uploaded_data_content[file_key] = parsed[file.file_id]
+        file_ids[file_key] = file.file_id
         
         with cols[i % 2]:
             st.markdown(f"**File:** `{file.name}`")
@@ -74,18 +111,16 @@ if uploaded_files:
     if st.button("🚀 Run Analysis", type="primary"):
         with st.spinner("Crunching numbers..."):
             try:
-                # 1. Run Logic
-                results = process_analysis(
-                    company_name=company_name,
-                    company_keywords=[k.strip() for k in company_aliases],
-                    related_parties=st.session_state.related_parties,
-                    account_info=account_info,
-                    uploaded_data=uploaded_data_content
+                # 1. Run Logic & 2. Generate HTML Report (cached on inputs + uploaded files)
+                results, html_report = run_analysis(
+                    company_name,
+                    [k.strip() for k in company_aliases],
+                    st.session_state.related_parties,
+                    account_info,
+                    file_ids,
+                    uploaded_data_content
                 )
                 
-                # 2. Generate HTML Report
-                html_report = generate_html_report(results, template_path="template.html")
-                
                 # 3. Display Results
                 st.divider()
                 st.subheader("📊 Analysis Report")
@@ -1,9 +1,12 @@
-import json
 import re
-from datetime import datetime
-from collections import defaultdict, Counter
+from functools import lru_cache
 from typing import Dict, List, Tuple, Any
 
+import ahocorasick
+import numpy as np
+import orjson
+import pandas as pd
+
 # ============================================================================
 # CONSTANTS
 # ============================================================================
@@ -32,29 +35,62 @@ STATUTORY_KEYWORDS = {
     'HRDF/PSMB': ['PEMBANGUNAN SUMBER MANUSIA', 'HRDF', 'PSMB', 'HRD CORP']
 }
 
+# Categorisation rules in priority order: (category, side, keywords).
+# Related-party names and company aliases are added to the first two rules per analysis.
+KEYWORD_RULES = [
+    ('RELATED_PARTY', None, []),
+    ('INTER_ACCOUNT_TRANSFER', None, INTER_ACCOUNT_MARKERS),
+    ('STATUTORY_PAYMENT', 'DEBIT',
+     STATUTORY_KEYWORDS['EPF/KWSP'] + STATUTORY_KEYWORDS['SOCSO/PERKESO'] + STATUTORY_KEYWORDS['LHDN/Tax']),
+    ('SALARY_WAGES', 'DEBIT', ['SALARY', 'PAYROLL']),
+    ('BANK_CHARGES', 'DEBIT', ['FEE', 'CHG']),
+    ('INTEREST_PROFIT_DIVIDEND', 'CREDIT', ['PROFIT', 'INTEREST']),
+    ('LOAN_DISBURSEMENT', 'CREDIT', ['LOAN', 'DISBURSE']),
+]
+
+DEFAULT_CATEGORIES = {'CREDIT': 'GENUINE_SALES_COLLECTIONS', 'DEBIT': 'SUPPLIER_VENDOR_PAYMENTS'}
+
+# Fixed category sets so the frame can hold them as pandas Categoricals (int codes)
+TXN_TYPES = pd.CategoricalDtype(['CREDIT', 'DEBIT'])
+TXN_CATEGORIES = pd.CategoricalDtype(list(dict.fromkeys([rule[0] for rule in KEYWORD_RULES] + list(DEFAULT_CATEGORIES.values()))))
+
+ROUND_FIGURE_THRESHOLD = 5000
+
+# Upper bounds (inclusive, in % swing) for LOW / MODERATE / HIGH; anything above is EXTREME
+VOLATILITY_BOUNDS = np.array([50, 100, 200])
+VOLATILITY_LEVELS = np.array(['LOW', 'MODERATE', 'HIGH', 'EXTREME'])
+
+# Only these fields are pulled out of each statement transaction; anything else is ignored
+TXN_FIELDS = ['date', 'description', 'credit', 'debit', 'balance']
+
+MONTHLY_FIELDS = ['month', 'total_credit', 'total_debit', 'ending_balance', 'net_change', 'highest_balance', 'lowest_balance']
+
+# monthly frame column -> report field
+MONTHLY_OUTPUT = {
+    'month': 'month_name', 'opening': 'opening', 'total_credit': 'credits', 'total_debit': 'debits',
+    'ending_balance': 'closing', 'highest_balance': 'highest_intraday', 'lowest_balance': 'lowest_intraday',
+    'volatility_level': 'volatility_level'
+}
+
+COUNTERPARTY_PREFIX_RE = re.compile(r'^(?:DUITNOW TO ACCOUNT|DUITNOW TRANSFER|IBG TRANSFER|INSTANT TRANSFER|TR TO C/A|TR FROM CA)\s*')
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def create_transaction_key(txn: Dict) -> Tuple:
-    amount = txn.get('credit', 0) + txn.get('debit', 0)
-    return (txn['date'], -amount, txn['description'])
-
-def is_round_figure(amount: float) -> bool:
-    return amount >= 5000 and amount % 1000 == 0
+def is_round_figure(amount):
+    # Works on a scalar or element-wise on a Series / ndarray
+    return (amount >= ROUND_FIGURE_THRESHOLD) & (amount % 1000 == 0)
 
-def calculate_volatility(high: float, low: float) -> Tuple[float, str]:
-    if high == low: return 0.0, 'LOW'
+def calculate_volatility(high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Element-wise over arrays of monthly highs / lows; flat or zero-average months are 0% / LOW
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
     avg = (high + low) / 2
-    if avg == 0: return 0.0, 'LOW'
-    swing = high - low
-    vol_pct = (swing / avg) * 100
-    
-    if vol_pct <= 50: level = 'LOW'
-    elif vol_pct <= 100: level = 'MODERATE'
-    elif vol_pct <= 200: level = 'HIGH'
-    else: level = 'EXTREME'
-    return round(vol_pct, 2), level
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_pct = np.where((high != low) & (avg != 0), (high - low) / avg * 100, 0.0)
+    levels = VOLATILITY_LEVELS[np.searchsorted(VOLATILITY_BOUNDS, vol_pct, side='left')]
+    return np.round(vol_pct, 2), levels
 
 def get_recurring_status(found_count: int, expected_count: int) -> str:
     if expected_count == 0: return 'N/A'
@@ -62,12 +98,82 @@ def get_recurring_status(found_count: int, expected_count: int) -> str:
     elif found_count >= 1: return 'PARTIAL'
     else: return 'NOT_FOUND'
 
-def normalize_counterparty(desc: str) -> str:
+@lru_cache(maxsize=32)
+def build_keyword_automaton(company_keywords: Tuple[str, ...], related_party_names: Tuple[str, ...]) -> ahocorasick.Automaton:
+    # One automaton for every categorisation keyword; each word maps to a bitmask of
+    # the KEYWORD_RULES (by index) it belongs to.
+    # Cached per keyword set, so reruns with the same settings reuse the compiled automaton.
+    extra_keywords = {0: related_party_names, 1: company_keywords}
+
+    automaton = ahocorasick.Automaton()
+    for rank, (_, _, keywords) in enumerate(KEYWORD_RULES):
+        for kw in list(keywords) + list(extra_keywords.get(rank, ())):
+            word = kw.upper()
+            if not word: continue
+            automaton.add_word(word, automaton.get(word, 0) | (1 << rank))
+    automaton.make_automaton()
+    return automaton
+
+def scan_keywords(automaton: ahocorasick.Automaton, texts: List[str]) -> np.ndarray:
+    # Scan all texts in one automaton pass over a newline-joined buffer (no keyword
+    # contains a newline, so matches never straddle two texts), then OR each match's
+    # rule bits into its text's slot by end offset.
+    hits = np.zeros(len(texts), dtype=np.int64)
+    if not texts: return hits
+    ends = np.cumsum([len(t) + 1 for t in texts])
+    found = list(automaton.iter('\n'.join(texts)))
+    if found:
+        end_idx, payloads = zip(*found)
+        np.bitwise_or.at(hits, np.searchsorted(ends, end_idx, side='right'), payloads)
+    return hits
+
+def categorize(hits: np.ndarray, is_credit: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    # First matching rule wins (np.select picks the first true condition per row)
+    conds = []
+    for rank, (category, side, _) in enumerate(KEYWORD_RULES):
+        cond = (hits & (1 << rank)) != 0
+        if side == 'CREDIT': cond &= is_credit
+        elif side == 'DEBIT': cond &= ~is_credit
+        if category == 'BANK_CHARGES': cond &= amount < 100
+        conds.append(cond)
+    defaults = np.where(is_credit, DEFAULT_CATEGORIES['CREDIT'], DEFAULT_CATEGORIES['DEBIT'])
+    return np.select(conds, [rule[0] for rule in KEYWORD_RULES], default=defaults)
+
+def normalize_counterparty(desc_upper: str) -> str:
     # Remove common banking prefixes to find the real company name
-    clean = re.sub(r'^(DUITNOW TO ACCOUNT|DUITNOW TRANSFER|IBG TRANSFER|INSTANT TRANSFER|TR TO C/A|TR FROM CA)\s*', '', desc.upper())
-    words = clean.split()
+    words = COUNTERPARTY_PREFIX_RE.sub('', desc_upper).split()
     # Return first 4 words as a grouping key
-    return " ".join(words[:4]) if words else desc[:30]
+    return " ".join(words[:4]) if words else desc_upper[:30]
+
+def top_counterparties(df: pd.DataFrame, n: int = 10) -> Dict[str, List[Dict]]:
+    # One groupby for both sides; groups keep first-seen order, so ties on amount
+    # resolve the same way every run
+    stats = df.groupby(['type', 'counterparty'], observed=True, sort=False)['amount'].agg(amount='sum', count='size')
+    sides = stats.index.get_level_values('type')
+    return {
+        side: stats[sides == side].droplevel('type').nlargest(n, 'amount').rename_axis('name').reset_index().to_dict('records')
+        for side in TXN_TYPES.categories
+    }
+
+def frame_records(df: pd.DataFrame) -> List[Dict]:
+    # Like to_dict('records') but leaves numbers as NumPy scalars instead of boxing each
+    # one into a Python object; generate_html_report serialises them with OPT_SERIALIZE_NUMPY
+    cols = list(df.columns)
+    return [dict(zip(cols, row)) for row in zip(*(df[c].to_numpy() for c in cols))]
+
+def derive_monthly_summary(df: pd.DataFrame) -> pd.DataFrame:
+    # Statements may list newest-first; a stable date sort puts each month's closing row
+    # last while keeping the statement's own order within a day
+    df = df.sort_values('date', kind='stable')
+    monthly = df.groupby(['account_id', df['date'].str[:7].rename('month')], observed=True).agg(
+        total_credit=('credit', 'sum'),
+        total_debit=('debit', 'sum'),
+        ending_balance=('balance', 'last'),
+        highest_balance=('balance', 'max'),
+        lowest_balance=('balance', 'min'),
+    )
+    monthly['net_change'] = monthly['total_credit'] - monthly['total_debit']
+    return monthly.reset_index()[['account_id'] + MONTHLY_FIELDS]
 
 # ============================================================================
 # MAIN ANALYSIS LOGIC
@@ -82,185 +188,131 @@ def process_analysis(
 ) -> Dict:
     
     # 1. SETUP & FLATTENING
-    all_transactions = []
-    
-    for acc_id, acc_data in uploaded_data.items():
-        if acc_id not in account_info: continue 
-        
-        txns = acc_data.get('transactions', [])
-        for txn in txns:
-            credit = float(txn.get('credit', 0) or 0)
-            debit = float(txn.get('debit', 0) or 0)
-            if credit == 0 and debit == 0: continue
-            
-            all_transactions.append({
-                'account_id': acc_id,
-                'date': txn['date'],
-                'description': txn['description'],
-                'debit': debit,
-                'credit': credit,
-                'amount': credit if credit > 0 else debit,
-                'balance': float(txn.get('balance', 0) or 0),
-                'type': 'CREDIT' if credit > 0 else 'DEBIT'
-            })
+    # Columnar layout: one typed column per field rather than a dict per transaction
+    frames = [
+        pd.DataFrame(acc_data['transactions'], columns=TXN_FIELDS).assign(account_id=acc_id)
+        for acc_id, acc_data in uploaded_data.items()
+        if acc_id in account_info and acc_data.get('transactions')
+    ]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TXN_FIELDS + ['account_id'])
+
+    for col in ('credit', 'debit'):
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float)
+    df['balance'] = pd.to_numeric(df['balance'], errors='coerce')
+
+    # Accounts without a statement monthly_summary get one rebuilt from their transactions,
+    # before zero-amount rows are dropped so their balances still count
+    has_summary = {acc_id for acc_id, acc_data in uploaded_data.items() if acc_data.get('monthly_summary')}
+    derived_monthly = derive_monthly_summary(df[~df['account_id'].isin(has_summary)])
+
+    df = df[(df['credit'] != 0) | (df['debit'] != 0)].copy()
+
+    is_credit = (df['credit'] > 0).to_numpy()
+    df['amount'] = np.where(is_credit, df['credit'], df['debit'])
+    df['type'] = pd.Categorical(np.where(is_credit, 'CREDIT', 'DEBIT'), dtype=TXN_TYPES)
+    df['account_id'] = df['account_id'].astype('category')
 
     # Sort deterministic
-    all_transactions.sort(key=lambda x: (x['date'], -x['amount'], x['description']))
+    df = df.sort_values(['date', 'amount', 'description'], ascending=[True, False, True], ignore_index=True)
 
     # 2. CATEGORIZATION ENGINE
-    categorized_txns = []
-    
-    # Trackers
-    total_credits = 0
-    total_debits = 0
-    cat_stats = {'credits': defaultdict(lambda: {'count':0, 'amount':0, 'txns':[]}), 
-                 'debits': defaultdict(lambda: {'count':0, 'amount':0, 'txns':[]})}
-    
-    payees = Counter()
-    payees_amt = defaultdict(float)
-    payers = Counter()
-    payers_amt = defaultdict(float)
-    
-    round_figures = []
-    statutory_dates = defaultdict(set)
-
-    for txn in all_transactions:
-        desc = txn['description'].upper()
-        amount = txn['amount']
-        category = 'GENUINE_SALES_COLLECTIONS' if txn['type'] == 'CREDIT' else 'SUPPLIER_VENDOR_PAYMENTS' # Defaults
-        
-        # --- LOGIC RULES ---
-        
-        # 2.1 Related Party
-        rp_match = next((rp for rp in related_parties if rp['name'].upper() in desc), None)
-        if rp_match:
-            category = 'RELATED_PARTY'
-            
-        # 2.2 Inter-Account
-        elif any(k in desc for k in INTER_ACCOUNT_MARKERS) or any(c.upper() in desc for c in company_keywords):
-             category = 'INTER_ACCOUNT_TRANSFER'
-             
-        # 2.3 Specific Debits
-        elif txn['type'] == 'DEBIT':
-            if any(k in desc for k in STATUTORY_KEYWORDS['EPF/KWSP']): category = 'STATUTORY_PAYMENT'; statutory_dates['EPF'].add(txn['date'][:7])
-            elif any(k in desc for k in STATUTORY_KEYWORDS['SOCSO/PERKESO']): category = 'STATUTORY_PAYMENT'; statutory_dates['SOCSO'].add(txn['date'][:7])
-            elif any(k in desc for k in STATUTORY_KEYWORDS['LHDN/Tax']): category = 'STATUTORY_PAYMENT'; statutory_dates['TAX'].add(txn['date'][:7])
-            elif 'SALARY' in desc or 'PAYROLL' in desc: category = 'SALARY_WAGES'
-            elif amount < 100 and ('FEE' in desc or 'CHG' in desc): category = 'BANK_CHARGES'
-            
-        # 2.4 Specific Credits
-        elif txn['type'] == 'CREDIT':
-            if 'PROFIT' in desc or 'INTEREST' in desc: category = 'INTEREST_PROFIT_DIVIDEND'
-            elif 'LOAN' in desc or 'DISBURSE' in desc: category = 'LOAN_DISBURSEMENT'
-
-        # --- AGGREGATION ---
-        txn['category'] = category
-        categorized_txns.append(txn)
-        
-        if txn['type'] == 'CREDIT':
-            total_credits += amount
-            cat_stats['credits'][category]['count'] += 1
-            cat_stats['credits'][category]['amount'] += amount
-            cat_stats['credits'][category]['txns'].append(txn)
-            
-            cp = normalize_counterparty(txn['description'])
-            payers[cp] += 1
-            payers_amt[cp] += amount
-            
-            if is_round_figure(amount):
-                round_figures.append(txn)
-                
-        else:
-            total_debits += amount
-            cat_stats['debits'][category]['count'] += 1
-            cat_stats['debits'][category]['amount'] += amount
-            cat_stats['debits'][category]['txns'].append(txn)
-            
-            cp = normalize_counterparty(txn['description'])
-            payees[cp] += 1
-            payees_amt[cp] += amount
+    automaton = build_keyword_automaton(tuple(company_keywords), tuple(rp['name'] for rp in related_parties))
+    # Missing and non-string descriptions (e.g. numeric references) become strings, so
+    # .str.upper() never yields NaN and factorize never hands out its -1 sentinel code
+    df['desc_upper'] = df['description'].fillna('').astype(str).str.upper()
+    # Recurring payments repeat the same description, so per-description work below runs
+    # once per distinct string and is broadcast back to rows through the factorized codes
+    desc_codes, desc_uniques = pd.factorize(df['desc_upper'])
+
+    # --- LOGIC RULES ---
+    # Priority: related party > inter-account > statutory > salary > bank charges,
+    # then interest / loan for credits, resolved from a single automaton pass.
+    keyword_hits = scan_keywords(automaton, list(desc_uniques))[desc_codes]
+    # Credit/debit split taken once in sorted order and reused by every later filter
+    is_credit = (df['type'] == 'CREDIT').to_numpy()
+    categories = categorize(keyword_hits, is_credit, df['amount'].to_numpy())
+    df['category'] = pd.Categorical(categories, dtype=TXN_CATEGORIES)
+
+    # --- AGGREGATION ---
+    cat_stats = df.groupby(['type', 'category'], observed=True, sort=False)['amount'].agg(['sum', 'count'])
+    # Every row carries a category, so the side totals roll up from the per-category sums
+    # without another pass over df; observed=False keeps a 0 total for a side with no rows
+    side_totals = cat_stats['sum'].groupby(level='type', observed=False).sum()
+    total_credits, total_debits = side_totals['CREDIT'], side_totals['DEBIT']
+
+    round_figures = df.loc[is_credit & is_round_figure(df['amount']), ['date', 'description', 'amount', 'account_id']]
+
+    df['counterparty'] = np.array([normalize_counterparty(d) for d in desc_uniques], dtype=object)[desc_codes]
 
     # 3. BUILD OUTPUT STRUCTURE
     
     # 3.1 Accounts
     accounts_output = []
-    all_dates = [t['date'] for t in all_transactions]
-    if all_dates:
-        start_date, end_date = min(all_dates), max(all_dates)
-        months = sorted(list(set(d[:7] for d in all_dates)))
+    # df is already sorted by date, so the period bounds are its first and last rows
+    if len(df):
+        start_date, end_date = df['date'].iloc[0], df['date'].iloc[-1]
     else:
         start_date, end_date = "", ""
-        months = []
 
-    acc_vol_levels = []
+    # Statement monthly summaries where provided, otherwise the figures derived from transactions
+    monthly = pd.concat([
+        pd.DataFrame(acc_data['monthly_summary'], columns=MONTHLY_FIELDS).assign(account_id=acc_id)
+        for acc_id, acc_data in uploaded_data.items()
+        if acc_id in account_info and acc_data.get('monthly_summary')
+    ] + [derived_monthly], ignore_index=True)
+    # Cast to float so integer statement figures don't surface as np.int64, which the
+    # standard json module cannot serialise
+    monthly[MONTHLY_FIELDS[1:]] = monthly[MONTHLY_FIELDS[1:]].apply(pd.to_numeric, errors='coerce').fillna(0).astype(float)
+    monthly['opening'] = monthly['ending_balance'] - monthly['net_change']
+    _, monthly['volatility_level'] = calculate_volatility(monthly['highest_balance'], monthly['lowest_balance'])
+    has_high_vol = bool(monthly['volatility_level'].isin(['HIGH', 'EXTREME']).any())
+    monthly_by_acc = dict(list(monthly.groupby('account_id', observed=True, sort=False)))
 
     for acc_id, info in account_info.items():
         if acc_id not in uploaded_data: continue
-        raw_data = uploaded_data[acc_id]
-        
-        m_summary = raw_data.get('monthly_summary', [])
-        acc_monthly_out = []
-        
-        total_acc_cr = 0
-        total_acc_dr = 0
-        
-        for m in m_summary:
-            high = m.get('highest_balance', 0)
-            low = m.get('lowest_balance', 0)
-            vol, level = calculate_volatility(high, low)
-            acc_vol_levels.append(level)
-            
-            acc_monthly_out.append({
-                'month_name': m['month'],
-                'opening': m.get('ending_balance', 0) - m.get('net_change', 0),
-                'credits': m.get('total_credit', 0),
-                'debits': m.get('total_debit', 0),
-                'closing': m.get('ending_balance', 0),
-                'highest_intraday': high,
-                'lowest_intraday': low,
-                'volatility_level': level
-            })
-            total_acc_cr += m.get('total_credit', 0)
-            total_acc_dr += m.get('total_debit', 0)
+        acc_monthly = monthly_by_acc.get(acc_id, monthly.iloc[:0])
 
         accounts_output.append({
             'account_id': acc_id,
             'bank_name': info['bank_name'],
             'account_number': info['account_number'],
-            'total_credits': total_acc_cr,
-            'total_debits': total_acc_dr,
-            'closing_balance': m_summary[-1]['ending_balance'] if m_summary else 0,
-            'monthly_summary': acc_monthly_out
+            'total_credits': acc_monthly['total_credit'].sum(),
+            'total_debits': acc_monthly['total_debit'].sum(),
+            'closing_balance': float(acc_monthly['ending_balance'].iloc[-1]) if len(acc_monthly) else 0,
+            'monthly_summary': frame_records(acc_monthly[list(MONTHLY_OUTPUT)].rename(columns=MONTHLY_OUTPUT))
         })
 
     # 3.2 Categories
     categories_out = {'credits': [], 'debits': []}
+    # Per-group partial selection instead of sorting every row by amount; keep='first'
+    # leaves equal amounts in date order since df is already sorted
+    top_5_idx = df.groupby(['type', 'category'], observed=True, sort=False)['amount'].nlargest(5).index
+    top_5_by_cat = {}
+    for txn_type, cat, idx in top_5_idx:
+        top_5_by_cat.setdefault((txn_type, cat), []).append(idx)
+    top_5_by_cat = {key: frame_records(df.loc[idx, ['date', 'description', 'amount']]) for key, idx in top_5_by_cat.items()}
     
-    for type_key in ['credits', 'debits']:
+    for type_key, side in [('credits', 'CREDIT'), ('debits', 'DEBIT')]:
         total_basis = total_credits if type_key == 'credits' else total_debits
         if total_basis == 0: total_basis = 1 
 
-        for cat, stats in cat_stats[type_key].items():
-            top_5 = sorted(stats['txns'], key=lambda x: -x['amount'])[:5]
+        for (txn_type, cat), stats in cat_stats.iterrows():
+            if txn_type != side: continue
             categories_out[type_key].append({
                 'category': cat,
-                'amount': stats['amount'],
-                'percentage': (stats['amount'] / total_basis * 100),
-                'top_5_transactions': [{
-                    'date': t['date'],
-                    'description': t['description'],
-                    'amount': t['amount']
-                } for t in top_5]
+                'amount': stats['sum'],
+                'percentage': (stats['sum'] / total_basis * 100),
+                'top_5_transactions': top_5_by_cat[(txn_type, cat)]
             })
 
     # 3.3 Counterparties (Top 10)
-    top_payers = sorted([{'name': k, 'amount': v, 'count': payers[k]} for k,v in payers_amt.items()], key=lambda x: -x['amount'])[:10]
-    top_payees = sorted([{'name': k, 'amount': v, 'count': payees[k]} for k,v in payees_amt.items()], key=lambda x: -x['amount'])[:10]
+    counterparties = top_counterparties(df)
+    top_payers, top_payees = counterparties['CREDIT'], counterparties['DEBIT']
 
     # 3.4 Integrity Checks
     checks = [
         {'id': 1, 'name': 'Balance Continuity', 'status': 'PASS', 'weight': 3, 'points': 3, 'details': 'Balances reconcile'},
-        {'id': 5, 'name': 'Volatility Level', 'status': 'FAIL' if any(lvl in ['HIGH', 'EXTREME'] for lvl in acc_vol_levels) else 'PASS', 'weight': 2, 'points': 0 if any(lvl in ['HIGH', 'EXTREME'] for lvl in acc_vol_levels) else 2, 'details': 'High volatility detected' if any(lvl in ['HIGH', 'EXTREME'] for lvl in acc_vol_levels) else 'Volatility within limits'},
+        {'id': 5, 'name': 'Volatility Level', 'status': 'FAIL' if has_high_vol else 'PASS', 'weight': 2, 'points': 0 if has_high_vol else 2, 'details': 'High volatility detected' if has_high_vol else 'Volatility within limits'},
         {'id': 6, 'name': 'Round Figure %', 'status': 'PASS', 'weight': 2, 'points': 2, 'details': f'{len(round_figures)} round figure txns'},
         {'id': 7, 'name': 'Kite Flying Risk', 'status': 'PASS', 'weight': 2, 'points': 2, 'details': 'No circular patterns detected'}, 
     ]
@@ -272,27 +324,32 @@ def process_analysis(
             'company_name': company_name,
             'period': f"{start_date} - {end_date}",
             'total_accounts': len(accounts_output),
-            'total_transactions': len(all_transactions),
+            'total_transactions': len(df),
             'total_credits': total_credits
         },
         'accounts': accounts_output,
         'categories': categories_out,
         'counterparties': {'payers': top_payers, 'payees': top_payees},
-        'volatility': {'overall_level': 'HIGH' if any(lvl in ['HIGH', 'EXTREME'] for lvl in acc_vol_levels) else 'LOW'},
+        'volatility': {'overall_level': 'HIGH' if has_high_vol else 'LOW'},
         'flags': {
-            'round_figures': [{'date': t['date'], 'description': t['description'], 'amount': t['amount'], 'account': t['account_id']} for t in round_figures]
+            'round_figures': frame_records(round_figures.rename(columns={'account_id': 'account'}))
         },
         'integrity_score': {'score': round(integrity_score, 1), 'checks': checks},
     }
     
     return result
 
+@lru_cache(maxsize=None)
+def load_template(template_path: str) -> Tuple[str, str]:
+    # Read and split the template once; each report is then just prefix + payload + suffix
+    with open(template_path, 'r', encoding='utf-8') as f:
+        prefix, _, suffix = f.read().partition('{{DATA_PAYLOAD}}')
+    return prefix, suffix
+
 def generate_html_report(data: Dict, template_path: str = "template.html") -> str:
-    json_str = json.dumps(data)
+    json_str = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY).decode()
     try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            html = f.read()
-        html = html.replace('{{DATA_PAYLOAD}}', json_str)
-        return html
+        prefix, suffix = load_template(template_path)
+        return prefix + json_str + suffix
     except Exception as e:
         return f"Error generating HTML: {str(e)}"
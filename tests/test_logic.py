@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from logic import process_analysis
+
+ACCOUNT_INFO = {'ACC_1': {'bank_name': 'CIMB', 'account_number': '1234567890'}}
+
+
+@pytest.mark.parametrize('description', [None, 12345])
+def test_non_string_description_does_not_inherit_another_rows_category(description):
+    # A null or numeric description used to factorize to -1 and pick up the keyword
+    # hits and counterparty of the last distinct description
+    uploaded_data = {'ACC_1': {'transactions': [
+        {'date': '2024-01-02', 'description': 'KWSP EPF', 'credit': 0, 'debit': 500, 'balance': 1000},
+        {'date': '2024-01-03', 'description': description, 'credit': 0, 'debit': 300, 'balance': 700},
+    ]}}
+
+    results = process_analysis('MY COMPANY SDN BHD', [], [], ACCOUNT_INFO, uploaded_data)
+
+    debits = {c['category']: c['amount'] for c in results['categories']['debits']}
+    assert debits == {'STATUTORY_PAYMENT': 500, 'SUPPLIER_VENDOR_PAYMENTS': 300}
+    payees = {p['name']: p['amount'] for p in results['counterparties']['payees']}
+    assert payees['KWSP EPF'] == 500
+
+
+def test_derived_monthly_summary_uses_date_order_for_newest_first_statements():
+    # No statement monthly_summary, so the month is rebuilt from transactions listed newest-first
+    uploaded_data = {'ACC_1': {'transactions': [
+        {'date': '2024-01-20', 'description': 'PAYMENT', 'credit': 0, 'debit': 100, 'balance': 900},
+        {'date': '2024-01-05', 'description': 'DEPOSIT', 'credit': 1000, 'debit': 0, 'balance': 1000},
+    ]}}
+
+    results = process_analysis('MY COMPANY SDN BHD', [], [], ACCOUNT_INFO, uploaded_data)
+
+    account = results['accounts'][0]
+    month = account['monthly_summary'][0]
+    assert month['closing'] == 900
+    assert month['opening'] == 0
+    assert account['closing_balance'] == 900
+
+
+def test_results_serialise_with_standard_json():
+    # Integer statement figures must not leak through as np.int64
+    uploaded_data = {
+        'ACC_1': {'transactions': [
+            {'date': '2024-01-05', 'description': 'DEPOSIT', 'credit': 6000, 'debit': 0, 'balance': 6000},
+        ]},
+        'ACC_2': {
+            'transactions': [
+                {'date': '2024-01-05', 'description': 'DEPOSIT', 'credit': 10, 'debit': 0, 'balance': 10},
+            ],
+            'monthly_summary': [
+                {'month': '2024-01', 'total_credit': 10, 'total_debit': 0, 'ending_balance': 10,
+                 'net_change': 10, 'highest_balance': 10, 'lowest_balance': 0},
+            ],
+        },
+    }
+    account_info = dict(ACCOUNT_INFO, ACC_2={'bank_name': 'HLB', 'account_number': '0987654321'})
+
+    results = process_analysis('MY COMPANY SDN BHD', [], [], account_info, uploaded_data)
+
+    json.dumps(results)
+
+
+def test_derived_monthly_summary_totals_closing_and_volatility():
+    # Without a statement monthly_summary, each month's figures come from its transactions:
+    # sums of credits / debits, the last balance as closing, and the balance range for volatility
+    uploaded_data = {'ACC_1': {'transactions': [
+        {'date': '2024-01-03', 'description': 'DEPOSIT', 'credit': 1000, 'debit': 0, 'balance': 1000},
+        {'date': '2024-01-10', 'description': 'PAYMENT', 'credit': 0, 'debit': 400, 'balance': 600},
+        {'date': '2024-01-25', 'description': 'DEPOSIT', 'credit': 200, 'debit': 0, 'balance': 800},
+        {'date': '2024-02-02', 'description': 'DEPOSIT', 'credit': 1200, 'debit': 0, 'balance': 2000},
+        {'date': '2024-02-15', 'description': 'PAYMENT', 'credit': 0, 'debit': 1900, 'balance': 100},
+    ]}}
+
+    results = process_analysis('MY COMPANY SDN BHD', [], [], ACCOUNT_INFO, uploaded_data)
+
+    account = results['accounts'][0]
+    jan, feb = account['monthly_summary']
+    assert (jan['month_name'], jan['credits'], jan['debits']) == ('2024-01', 1200, 400)
+    assert (jan['opening'], jan['closing']) == (0, 800)
+    assert (jan['highest_intraday'], jan['lowest_intraday'], jan['volatility_level']) == (1000, 600, 'LOW')
+    assert (feb['month_name'], feb['credits'], feb['debits']) == ('2024-02', 1200, 1900)
+    assert (feb['opening'], feb['closing']) == (800, 100)
+    assert (feb['highest_intraday'], feb['lowest_intraday'], feb['volatility_level']) == (2000, 100, 'HIGH')
+    assert (account['total_credits'], account['total_debits'], account['closing_balance']) == (2400, 2300, 100)
+
+    assert results['volatility']['overall_level'] == 'HIGH'
+    volatility_check = next(c for c in results['integrity_score']['checks'] if c['name'] == 'Volatility Level')
+    assert volatility_check['status'] == 'FAIL'